@@ -0,0 +1,262 @@
+import json
+import logging
+import math
+import os
+from datetime import datetime, timezone
+
+from parsing import parse_price_millis
+from pricing import normalize_fuel
+
+ANY = '*'
+
+
+# Function to get a rule setting as a float, JSON allows NaN and Infinity which no rule can work with
+def _finite(value):
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"{value} is not a finite number")
+    return number
+
+
+def _millis(dollars):
+    return round(_finite(_finite(dollars) * 1000))
+
+
+# Rule: a station in the region is at or below a price
+class ThresholdRule:
+    kind = 'threshold'
+
+    def __init__(self, rule_id, region, fuel, max_price):
+        self.rule_id, self.region, self.fuel = rule_id, region, fuel
+        self.max_millis = _millis(max_price)
+
+    def check(self, engine, key, gas_price, price_millis):
+        if price_millis <= self.max_millis:
+            return f"{gas_price['price']} is at or below ${self.max_millis / 1000:.3f}"
+
+
+# Rule: a station undercuts the average of every station in the scrape by a percentage, the average is only known
+# once the whole scrape has been seen so matches are reported when the scrape finishes. Scrapes with fewer than
+# min_stations prices are too small for a meaningful average and report nothing
+class RelativeToAverageRule:
+    kind = 'below_average'
+    tracks_prices = True
+
+    def __init__(self, rule_id, region, fuel, percent, min_stations=5):
+        self.rule_id, self.region, self.fuel = rule_id, region, fuel
+        self.factor = 1 - _finite(percent) / 100
+        self.min_stations = int(_finite(min_stations))
+
+    def check(self, engine, key, gas_price, price_millis):
+        return None
+
+    def finish(self, engine, key):
+        prices = engine.prices.get(key, [])
+        if not prices or len(prices) < self.min_stations:
+            return []
+        average = sum(price_millis for price_millis, _ in prices) / len(prices)
+        return [(gas_price, f"{gas_price['price']} is {100 - price_millis / average * 100:.1f}% below the area "
+                            f"average of ${average / 1000:.3f}")
+                for price_millis, gas_price in prices if price_millis <= average * self.factor]
+
+
+# Rule: a station's price dropped since the last time it was seen
+class PriceDropRule:
+    kind = 'price_drop'
+    tracks_last_seen = True
+
+    def __init__(self, rule_id, region, fuel, min_drop=0):
+        self.rule_id, self.region, self.fuel = rule_id, region, fuel
+        self.min_drop_millis = max(_millis(min_drop), 1)
+
+    def check(self, engine, key, gas_price, price_millis):
+        last_millis = engine.last_seen.get((key, gas_price['name'], gas_price['address']))
+        if last_millis is not None and last_millis - price_millis >= self.min_drop_millis:
+            return f"{gas_price['price']} dropped ${(last_millis - price_millis) / 1000:.3f} since last seen"
+
+
+# Rule: the cheapest station within a distance, only known once the whole scrape has been seen so it is
+# reported when the scrape finishes
+class CheapestInRadiusRule:
+    kind = 'cheapest_in_radius'
+    needs_distance = True
+
+    def __init__(self, rule_id, region, fuel, radius):
+        self.rule_id, self.region, self.fuel = rule_id, region, fuel
+        self.radius = _finite(radius)
+
+    def check(self, engine, key, gas_price, price_millis):
+        distance = gas_price.get('distance')
+        if distance is None or distance > self.radius:
+            return None
+        cheapest = engine.cheapest.get((self, key))
+        if cheapest is None or price_millis < cheapest[0]:
+            engine.cheapest[(self, key)] = (price_millis, gas_price)
+        return None
+
+    def finish(self, engine, key):
+        cheapest = engine.cheapest.get((self, key))
+        if cheapest is None:
+            return []
+        gas_price = cheapest[1]
+        return [(gas_price,
+                 f"{gas_price['price']} is the cheapest within {self.radius:g} ({gas_price['distance']:g} away)")]
+
+
+RULE_TYPES = {rule.kind: rule for rule in [ThresholdRule, RelativeToAverageRule, PriceDropRule, CheapestInRadiusRule]}
+
+
+# Evaluates rules on every row as it is scraped, rows are only checked against the rules of their region and fuel.
+# Last seen prices are kept in state_filename between runs when one is given
+class AlertEngine:
+    def __init__(self, rules, sinks, state_filename=None):
+        self.sinks = sinks
+        self._rules = {}
+        for rule in rules:
+            self._rules.setdefault((rule.region, rule.fuel), []).append(rule)
+        self._matching = {}
+        self._watching = None
+        self.prices = {}
+        self.last_seen = {}
+        self.cheapest = {}
+        # Station distances are only scraped when a rule needs them
+        self.needs_distance = any(getattr(rule, 'needs_distance', False) for rule in rules)
+        self.state_filename = state_filename
+        if state_filename and os.path.exists(state_filename):
+            self.load_state()
+
+    # Function to get the rules of a region and fuel including the wildcard ones, worked out once per pair
+    def _rules_for(self, key):
+        matching = self._matching.get(key)
+        if matching is None:
+            region, fuel = key
+            rules = []
+            for rule_key in [(region, fuel), (region, ANY), (ANY, fuel), (ANY, ANY)]:
+                rules.extend(self._rules.get(rule_key, []))
+            matching = (rules,
+                        any(getattr(rule, 'tracks_prices', False) for rule in rules),
+                        any(getattr(rule, 'tracks_last_seen', False) for rule in rules))
+            self._matching[key] = matching
+        return matching
+
+    # Function to start a new scrape, scraped prices and cheapest stations are per scrape, last seen prices are kept
+    def start_scrape(self):
+        self.prices = {}
+        self.cheapest = {}
+
+    def evaluate(self, gas_price, region, fuel):
+        key = (region.lower(), fuel)
+        rules, tracks_prices, tracks_last_seen = self._rules_for(key)
+        if not rules or not isinstance(gas_price['price'], str):
+            return
+        price_millis = parse_price_millis(gas_price['price'])
+        if price_millis is None:
+            return
+
+        for rule in rules:
+            message = rule.check(self, key, gas_price, price_millis)
+            if message:
+                self._emit(rule, region, fuel, gas_price, message)
+
+        if tracks_prices:
+            self.prices.setdefault(key, []).append((price_millis, gas_price))
+        if tracks_last_seen:
+            self.last_seen[(key, gas_price['name'], gas_price['address'])] = price_millis
+
+    # Function to get the on_row callback that scrape_data calls for a region and fuel
+    def watch(self, region, fuel):
+        self.start_scrape()
+        self._watching = (region, fuel)
+        return lambda gas_price: self.evaluate(gas_price, region, fuel)
+
+    # Function to call once a scrape is over, sends the alerts that need every row and saves the last seen prices
+    def finish_scrape(self):
+        if self._watching:
+            region, fuel = self._watching
+            key = (region.lower(), fuel)
+            for rule in self._rules_for(key)[0]:
+                if hasattr(rule, 'finish'):
+                    for gas_price, message in rule.finish(self, key):
+                        self._emit(rule, region, fuel, gas_price, message)
+            self._watching = None
+        if self.state_filename:
+            self.save_state()
+
+    def load_state(self):
+        try:
+            with open(self.state_filename, 'r', encoding='utf-8') as file:
+                state = json.load(file)
+            self.last_seen = {((region, fuel), name, address): price_millis
+                              for region, fuel, name, address, price_millis in state['last_seen']}
+        except (IOError, ValueError, KeyError, TypeError) as e:
+            logging.error(f"Failed to load alert state from {self.state_filename}: {e}")
+
+    def save_state(self):
+        state = {'last_seen': [[region, fuel, name, address, price_millis]
+                               for ((region, fuel), name, address), price_millis in self.last_seen.items()]}
+        try:
+            with open(self.state_filename, 'w', encoding='utf-8') as file:
+                json.dump(state, file, ensure_ascii=False)
+        except IOError as e:
+            logging.error(f"Failed to save alert state to {self.state_filename}: {e}")
+
+    def _emit(self, rule, region, fuel, gas_price, message):
+        alert = {'rule': rule.rule_id, 'type': rule.kind, 'region': region, 'fuel': fuel,
+                 'name': gas_price['name'], 'address': gas_price['address'], 'price': gas_price['price'],
+                 'distance': gas_price.get('distance'), 'message': message,
+                 'time': datetime.now(timezone.utc).isoformat()}
+        for sink in self.sinks:
+            try:
+                sink(alert)
+            except Exception as e:
+                logging.error(f"Failed to send alert {rule.rule_id}: {e}")
+
+
+# Function to load rules from a JSON file holding a list like
+# [{"type": "threshold", "region": "90210", "fuel": "diesel", "max_price": 3.5}]
+def load_rules(filename):
+    with open(filename, 'r', encoding='utf-8') as file:
+        rule_configs = json.load(file)
+    if not isinstance(rule_configs, list):
+        raise ValueError("The rules file must hold a list of rules")
+    rules = []
+    for position, config in enumerate(rule_configs, start=1):
+        if not isinstance(config, dict):
+            raise ValueError(f"Rule {position} must be an object like {{\"type\": \"threshold\", ...}}")
+        config = dict(config)
+        rule_type = RULE_TYPES.get(config.pop('type', None))
+        if rule_type is None:
+            raise ValueError(f"Rule {position} must have a type, one of: {', '.join(RULE_TYPES)}")
+        rule_id = str(config.pop('id', position))
+        region = str(config.pop('region', ANY)).strip().lower()
+        fuel = config.pop('fuel', ANY)
+        fuel = ANY if fuel == ANY else normalize_fuel(str(fuel))
+        try:
+            rules.append(rule_type(rule_id, region, fuel, **config))
+        except (TypeError, ValueError, OverflowError) as e:
+            raise ValueError(f"Invalid {rule_type.kind} rule {position}: {e}")
+    return rules
+
+
+# Sink that prints alerts
+def stdout_sink(alert):
+    print(f"ALERT [{alert['rule']}] {alert['name']}, {alert['address']}: {alert['message']}")
+
+
+# Function to get a sink that appends alerts to a JSON Lines file
+def file_sink(filename):
+    def sink(alert):
+        with open(filename, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(alert, ensure_ascii=False) + '\n')
+    return sink
+
+
+# Function to get a sink that posts alerts as JSON to a webhook URL
+def webhook_sink(url):
+    def sink(alert):
+        import requests
+
+        response = requests.post(url, json=alert, timeout=5)
+        if response.status_code >= 400:
+            logging.error(f"Webhook {url} rejected alert {alert['rule']}, status code: {response.status_code}")
+    return sink
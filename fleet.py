@@ -0,0 +1,105 @@
+import json
+import math
+
+from pricing import UK_GALLON_IN_LITERS, fill_unit_divisor, station_price
+
+RANKING_FIELDNAMES = ['vehicle', 'rank', 'name', 'address', 'price', 'distance', 'Fill Cost', 'Trip Cost',
+                      'Effective Cost']
+
+
+# Function to load vehicles from a JSON file holding a list like
+# [{"name": "Van 1", "amount": 15, "unit": "gal", "consumption": 0.05}]
+# where consumption is the fuel burned per unit of station distance, in the same unit as the amount
+def load_vehicles(filename):
+    with open(filename, 'r', encoding='utf-8') as file:
+        vehicle_configs = json.load(file)
+    if not isinstance(vehicle_configs, list):
+        raise ValueError("The vehicles file must hold a list of vehicles")
+    vehicles = []
+    for position, config in enumerate(vehicle_configs, start=1):
+        if not isinstance(config, dict):
+            raise ValueError(f"Vehicle {position} must be an object like {{\"name\": \"Van 1\", ...}}")
+        try:
+            unit = str(config.get('unit', 'gal')).lower()
+            amount = float(config['amount'])
+            consumption = float(config['consumption'])
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Vehicle {position} needs a numeric amount and consumption: {e}")
+        # NaN is neither below nor above zero, so it has to be ruled out on its own
+        finite = math.isfinite(amount) and math.isfinite(consumption)
+        if unit not in ['l', 'gal', 'b'] or not finite or amount < 0 or consumption < 0:
+            raise ValueError(f"Vehicle {position} needs a unit of 'l', 'gal' or 'b' and positive numbers")
+        # British gallons are filled as liters, the same as the cost to fill menu option
+        if unit == 'b':
+            amount, consumption, unit = amount * UK_GALLON_IN_LITERS, consumption * UK_GALLON_IN_LITERS, 'l'
+        vehicles.append({'name': str(config.get('name', f"Vehicle {position}")), 'amount': amount,
+                         'unit': unit, 'consumption': consumption})
+    return vehicles
+
+
+# Function to rank stations for every vehicle by the cost to fill plus the fuel burned driving there and back,
+# all stations and vehicles are worked out in one pass over a vehicles x stations matrix. Returns one ranking per
+# vehicle and the number of stations left out for having no price or distance
+def rank_effective_cost(gas_prices, vehicles, tax, top_k=5):
+    import numpy as np
+
+    stations, prices, dollars, distances = [], [], [], []
+    skipped = 0
+    for gas_price in gas_prices:
+        if not isinstance(gas_price['price'], str) or gas_price.get('distance') is None:
+            skipped += 1
+            continue
+        price, is_dollars = station_price(gas_price['price'])
+        if price is None:
+            skipped += 1
+            continue
+        stations.append(gas_price)
+        prices.append(price)
+        dollars.append(is_dollars)
+        distances.append(float(gas_price['distance']))
+    if not stations or not vehicles:
+        return [[] for _ in vehicles], skipped
+
+    prices = np.array(prices)[None, :]
+    distances = np.array(distances)[None, :]
+    amounts = np.array([vehicle['amount'] for vehicle in vehicles])[:, None]
+    consumptions = np.array([vehicle['consumption'] for vehicle in vehicles])[:, None]
+    # The divisor only depends on the vehicle unit and whether the station price is in dollars
+    divisors = np.where(np.array(dollars)[None, :],
+                        np.array([fill_unit_divisor(True, vehicle['unit']) for vehicle in vehicles])[:, None],
+                        np.array([fill_unit_divisor(False, vehicle['unit']) for vehicle in vehicles])[:, None])
+
+    # Same maths as fill_cost, which is linear in the amount, so fill and trip costs can be split afterwards
+    unit_costs = prices / divisors
+    unit_costs = unit_costs + (unit_costs * tax)
+    fill_costs = amounts * unit_costs
+    trip_costs = (2 * consumptions * distances) * unit_costs
+    effective_costs = fill_costs + trip_costs
+
+    top_k = min(top_k, len(stations))
+    if top_k < len(stations):
+        candidates = np.argpartition(effective_costs, top_k - 1, axis=1)[:, :top_k]
+    else:
+        candidates = np.broadcast_to(np.arange(len(stations)), effective_costs.shape)
+    rows = np.arange(len(vehicles))[:, None]
+    order = np.argsort(effective_costs[rows, candidates], axis=1, kind='stable')
+    best = candidates[rows, order]
+
+    rankings = []
+    for vehicle_index, vehicle in enumerate(vehicles):
+        ranking = []
+        for rank, station_index in enumerate(best[vehicle_index], start=1):
+            station = stations[station_index]
+            ranking.append({
+                'vehicle': vehicle['name'],
+                'rank': rank,
+                'name': station['name'],
+                'address': station['address'],
+                'price': station['price'],
+                'distance': station['distance'],
+                'Fill Cost': f"${fill_costs[vehicle_index, station_index]:.2f}",
+                'Trip Cost': f"${trip_costs[vehicle_index, station_index]:.2f}",
+                'Effective Cost': f"${effective_costs[vehicle_index, station_index]:.2f}",
+            })
+        rankings.append(ranking)
+    return rankings, skipped
@@ -0,0 +1,226 @@
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import sys
+import time
+
+FILE_TYPES = ['csv', 'txt', 'csv.gz', 'csv.zst', 'ndjson', 'msgpack']
+FIELDNAMES = ['name', 'address', 'price', 'last_updated']
+# Snapshots are written and read in large blocks instead of one small write per row
+BUFFER_SIZE = 1 << 20
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+
+# Function to import an optional dependency only when its file type is used
+def _require(module_name, file_type):
+    try:
+        return __import__(module_name)
+    except ImportError:
+        raise ImportError(f"The {file_type} file type needs the '{module_name}' package, install it with pip")
+
+
+# Function to get a row as the strings a CSV file would hold, so every format reads back the same values
+def _row_values(row, fieldnames):
+    return ['' if row.get(field) is None else str(row[field]) for field in fieldnames]
+
+
+def _open_text_writer(filepath, file_type):
+    # Optional packages are imported before the file is created, so a missing one leaves nothing behind
+    zstandard = _require('zstandard', file_type) if file_type == 'csv.zst' else None
+    raw = open(filepath, 'wb', buffering=BUFFER_SIZE)
+    if file_type == 'csv.gz':
+        binary = gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6)
+    elif file_type == 'csv.zst':
+        binary = zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=True)
+    else:
+        binary = raw
+    # GzipFile leaves the file it was given open, so remember to close it too
+    return io.TextIOWrapper(binary, encoding='utf-8', newline=''), raw
+
+
+def _open_text_reader(filepath, file_type):
+    zstandard = _require('zstandard', file_type) if file_type == 'csv.zst' else None
+    raw = open(filepath, 'rb', buffering=BUFFER_SIZE)
+    if file_type == 'csv.gz':
+        binary = io.BufferedReader(gzip.GzipFile(fileobj=raw, mode='rb'), BUFFER_SIZE)
+    elif file_type == 'csv.zst':
+        binary = io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw, closefd=True), BUFFER_SIZE)
+    else:
+        binary = raw
+    return io.TextIOWrapper(binary, encoding='utf-8', newline=''), raw
+
+
+# Function to write gas prices to a file in any of the supported file types
+def write_gas_prices(filepath, gas_prices, file_type, fieldnames=FIELDNAMES):
+    if file_type not in FILE_TYPES:
+        raise ValueError(f"Unsupported file type: {file_type}")
+    if file_type == 'msgpack':
+        msgpack = _require('msgpack', file_type)
+        packer = msgpack.Packer()
+        with open(filepath, 'wb', buffering=BUFFER_SIZE) as file:
+            # The field names are written once, every record after them is a plain array of values
+            file.write(packer.pack(fieldnames))
+            for gas_price in gas_prices:
+                file.write(packer.pack(_row_values(gas_price, fieldnames)))
+        return
+
+    file, raw = _open_text_writer(filepath, file_type)
+    try:
+        if file_type in ['csv', 'csv.gz', 'csv.zst']:
+            writer = csv.writer(file)
+            writer.writerow(fieldnames)
+            writer.writerows(_row_values(gas_price, fieldnames) for gas_price in gas_prices)
+        elif file_type == 'ndjson':
+            for gas_price in gas_prices:
+                file.write(json.dumps(dict(zip(fieldnames, _row_values(gas_price, fieldnames))), ensure_ascii=False))
+                file.write('\n')
+        else:
+            for gas_price in gas_prices:
+                file.write(', '.join(_row_values(gas_price, fieldnames)) + '\n')
+    finally:
+        file.close()
+        raw.close()
+
+
+# Function to get the compressed file type a file's first bytes belong to, or None for uncompressed files
+def _detect_compression(head):
+    if head.startswith(GZIP_MAGIC):
+        return 'csv.gz'
+    if head.startswith(ZSTD_MAGIC):
+        return 'csv.zst'
+    return None
+
+
+def _read_head(filepath):
+    with open(filepath, 'rb') as file:
+        return file.read(4)
+
+
+# Function to find the file type of a file from its first bytes, falling back to its extension
+def detect_file_type(filepath):
+    head = _read_head(filepath)
+    compression = _detect_compression(head)
+    if compression:
+        return compression
+    extension = os.path.splitext(filepath)[1].lower()
+    if extension in ['.ndjson', '.jsonl']:
+        return 'ndjson'
+    if extension == '.msgpack':
+        return 'msgpack'
+    if extension == '.txt':
+        return 'txt'
+    if head.lstrip()[:1] == b'{':
+        return 'ndjson'
+    return 'csv'
+
+
+# Function to parse a TXT line written as 'name, address, price, last_updated', or with ', Tax, Filled, Total Price'
+# added by the cost to fill, the address may contain commas. Returns None for lines in neither layout
+def _parse_txt_line(line):
+    fields = line.rstrip('\n').rsplit(', ', 5)
+    if len(fields) == 6 and fields[3].endswith('%') and fields[5].startswith('$'):
+        name_and_address, price, last_updated, tax, filled, total_price = fields
+        extra = {'Tax': tax, 'Filled': filled, 'Total Price': total_price}
+    else:
+        fields = line.rstrip('\n').rsplit(', ', 2)
+        if len(fields) != 3:
+            return None
+        name_and_address, price, last_updated = fields
+        extra = {}
+    name, _, address = name_and_address.partition(', ')
+    return {'name': name, 'address': address, 'price': price, 'last_updated': last_updated, **extra}
+
+
+# Function to read the gas prices of a msgpack file, the first record must be the field names
+def _iter_msgpack(filepath):
+    msgpack = _require('msgpack', 'msgpack')
+    with open(filepath, 'rb') as file:
+        unpacker = msgpack.Unpacker(file, raw=False, read_size=BUFFER_SIZE)
+        try:
+            fieldnames = next(unpacker, None)
+            if fieldnames is None:
+                return
+            if not isinstance(fieldnames, list) or not all(isinstance(field, str) for field in fieldnames):
+                raise ValueError(f"{filepath} does not start with the field names of a msgpack gas prices file")
+            for values in unpacker:
+                if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+                    raise ValueError(f"{filepath} holds a record that is not a list of strings")
+                yield dict(zip(fieldnames, values))
+        except (msgpack.exceptions.UnpackException, msgpack.exceptions.ExtraData) as e:
+            raise ValueError(f"{filepath} is not a valid msgpack gas prices file ({type(e).__name__})")
+
+
+# Function to read gas prices one row at a time from a file of any supported type. Compressed files are always
+# recognised from their first bytes, the file type given is only used for files without such a signature and the
+# type is detected from the file when none is given
+def iter_gas_prices(filepath, file_type=None):
+    compression = _detect_compression(_read_head(filepath))
+    if compression:
+        file_type = compression
+    elif file_type in ['csv.gz', 'csv.zst']:
+        raise ValueError(f"{filepath} is not a {file_type} file")
+    else:
+        file_type = file_type or detect_file_type(filepath)
+    if file_type == 'msgpack':
+        yield from _iter_msgpack(filepath)
+        return
+
+    file, raw = _open_text_reader(filepath, file_type)
+    try:
+        if file_type == 'ndjson':
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        elif file_type == 'txt':
+            for line_number, line in enumerate(file, start=1):
+                if not line.strip():
+                    continue
+                gas_price = _parse_txt_line(line)
+                if gas_price is None:
+                    logging.warning(f"Skipping malformed line {line_number} in {filepath}")
+                    continue
+                yield gas_price
+        else:
+            yield from csv.DictReader(file)
+    finally:
+        file.close()
+        raw.close()
+
+
+# Function to compare the size and write/read speed of every file type on generated data
+def benchmark_formats(total_rows=100000):
+    import tempfile
+
+    gas_prices = [{'name': f"Station {i}", 'address': f"{i} Main St, Springfield, IL, {60000 + i % 1000}",
+                   'price': f"${3 + i % 100 / 100:.2f}", 'last_updated': f"{i % 24} hours ago"}
+                  for i in range(total_rows)]
+    csv_size = None
+    print(f"{'file type':<10} {'bytes':>12} {'ratio':>7} {'write MB/s':>11} {'read MB/s':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for file_type in FILE_TYPES:
+            filepath = os.path.join(directory, f"benchmark.{file_type}")
+            try:
+                start = time.perf_counter()
+                write_gas_prices(filepath, gas_prices, file_type)
+                write_seconds = time.perf_counter() - start
+                start = time.perf_counter()
+                rows_read = sum(1 for _ in iter_gas_prices(filepath))
+                read_seconds = time.perf_counter() - start
+            except ImportError as e:
+                print(f"{file_type:<10} skipped: {e}")
+                continue
+            assert rows_read == total_rows
+            size = os.path.getsize(filepath)
+            csv_size = csv_size or size
+            # MB/s is measured against the uncompressed CSV size so the numbers compare across formats
+            print(f"{file_type:<10} {size:>12} {size / csv_size:>7.2f} {csv_size / write_seconds / 1e6:>11.1f} "
+                  f"{csv_size / read_seconds / 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    benchmark_formats(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -1,21 +1,26 @@
-import os
-import requests
-from bs4 import BeautifulSoup
-import csv
-import datetime
-from datetime import datetime, timedelta, timezone
-from dateutil.parser import parse
-import json
 import logging
-import matplotlib.pyplot as plt
+import os
+from datetime import datetime
+
+from formats import FILE_TYPES, iter_gas_prices, write_gas_prices
+from parsing import convert_last_updated, convert_price
+from pricing import FUEL_TYPES, UK_GALLON_IN_LITERS, fill_cost, normalize_fuel
+from scraper import scrape_data
 
 # Constants
-USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
-GRAPHQL_URL = 'https://www.gasbuddy.com/graphql'
-HEADERS = {'User-Agent': USER_AGENT, 'Content-Type': 'application/json'}
+FILE_TYPE_CHOICES = '/'.join(FILE_TYPES)
+INVALID_FILE_TYPE = f"Invalid file type. Please enter one of: {', '.join(FILE_TYPES)}."
+
+LOG_LEVEL_VARIABLE = 'FUELMEUP4LESS_LOG_LEVEL'
 
-# Initialize logging
-logging.basicConfig(level=logging.DEBUG, filename='scraper.log', format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Initialize logging when the program starts instead of on import, set FUELMEUP4LESS_LOG_LEVEL=DEBUG for more detail
+def configure_logging():
+    level = os.environ.get(LOG_LEVEL_VARIABLE, 'WARNING').upper()
+    # delay so the log file is only opened once something is logged
+    logging.basicConfig(level=getattr(logging, level, logging.WARNING),
+                        handlers=[logging.FileHandler('scraper.log', encoding='utf-8', delay=True)],
+                        format='%(asctime)s - %(levelname)s - %(message)s')
 
 
 # Welcome message and usage instructions
@@ -30,12 +35,15 @@ def welcome_message():
     print("4 - All-In-One")
     print("5 - Cost to fill")
     print("6 - Exit")
+    print("7 - Query Server")
+    print("8 - Scrape With Alerts")
+    print("9 - Fleet Ranking")
 
 
 # Function to display menu and get user choice
 def get_menu_choice():
     print("\nPlease choose an option:")
-    choice = input("Enter 'h' for help or a number between 1-6 to select an action: ").strip().lower()
+    choice = input("Enter 'h' for help or a number between 1-9 to select an action: ").strip().lower()
     return choice
 
 
@@ -56,8 +64,7 @@ def get_scraping_input():
     while True:
         fuel_input = input(
             "Choose fuel type (1=Regular, 2=Midgrade, 3=Premium, 4=Diesel, 5=E85, 6=UNL88 or enter fuel name): ").strip().lower()
-        fuel_dict = {'regular': '1', 'midgrade': '2', 'premium': '3', 'diesel': '4', 'e85': '5', 'unl88': '6'}
-        fuel_type = fuel_dict.get(fuel_input, fuel_input)
+        fuel_type = FUEL_TYPES.get(fuel_input, fuel_input)
         if fuel_type not in ['1', '2', '3', '4', '5', '6']:
             print("Invalid fuel type. Please enter a number between 1-6 or the corresponding fuel name.")
             continue
@@ -73,9 +80,9 @@ def get_scraping_input():
 
     file_type = None
     while True:
-        file_type = input("Choose output file type (csv/txt): ").strip().lower()
-        if file_type not in ['csv', 'txt']:
-            print("Invalid file type. Please enter 'csv' or 'txt'.")
+        file_type = input(f"Choose output file type ({FILE_TYPE_CHOICES}): ").strip().lower()
+        if file_type not in FILE_TYPES:
+            print(INVALID_FILE_TYPE)
             continue
         break
 
@@ -117,6 +124,8 @@ def handle_sorting(gas_prices):
 
 # Function to plot graph
 def graph_data(gas_prices):
+    from plotting import plot_gas_prices
+
     plot_gas_prices(gas_prices)
 
 
@@ -168,46 +177,6 @@ def all_in_one():
     graph_data(sorted_data)
 
 
-# Function to scrape data
-def scrape_data(city_or_postal_code, fuel_type, payment_method, total_pages):
-    all_gas_prices = []
-
-    # Fetch and parse initial page
-    initial_soup = fetch_initial_data(city_or_postal_code, fuel_type, payment_method)
-    if initial_soup:
-        initial_data = parse_initial_data(initial_soup)
-        all_gas_prices.extend(initial_data)
-
-        # Fetch and parse additional pages if requested
-        if total_pages > 1:
-            cursor = "40"  # Starting cursor for the second page
-            for _ in range(2, total_pages + 1):
-                json_data = fetch_additional_gas_prices(city_or_postal_code, fuel_type, cursor)
-                if json_data:
-                    additional_data, new_cursor = parse_additional_data(json_data)
-                    all_gas_prices.extend(additional_data)
-                    cursor = new_cursor  # Update cursor for the next iteration
-                else:
-                    break  # Exit loop if data fetching fails
-    else:
-        print("Failed to retrieve initial data. Please check your internet connection and try again.")
-        return None
-
-    return all_gas_prices
-
-
-# Function to format last updated time
-def format_last_updated(posted_time):
-    posted_datetime = datetime.fromisoformat(posted_time.rstrip('Z')).replace(tzinfo=timezone.utc)
-    now_datetime = datetime.now(timezone.utc)
-    diff = now_datetime - posted_datetime
-    if diff.days == 0:
-        hours_ago = diff.seconds // 3600
-        return f"{hours_ago} hours ago" if hours_ago > 0 else "Less than an hour ago"
-    else:
-        return posted_datetime.strftime("%Y-%m-%d")
-
-
 # Sort gas prices
 def sort_gas_prices(gas_prices, sort_by='price', ascending=True):
     # Filter out entries with None prices before sorting
@@ -215,259 +184,15 @@ def sort_gas_prices(gas_prices, sort_by='price', ascending=True):
         gas_prices = [entry for entry in gas_prices if entry['price'] is not None]
 
     # Sorting logic remains the same
+    now = datetime.now()
     key_funcs = {
         'name': lambda x: x['name'],
         'price': lambda x: x['price'] or float('inf'),  # Handle None values by converting them to infinity
-        'last_updated': lambda x: convert_last_updated(x['last_updated'])
+        'last_updated': lambda x: convert_last_updated(x['last_updated'], now)
     }
     return sorted(gas_prices, key=key_funcs[sort_by], reverse=not ascending)
 
 
-# Plot gas prices
-def plot_gas_prices(gas_prices):
-    # Convert price strings to floats and filter out invalid entries
-    valid_entries = [entry for entry in gas_prices if isinstance(entry['price'], float)]
-
-    if not valid_entries:
-        print("No valid prices available for graphing.")
-        return
-
-    names = [entry['name'] for entry in valid_entries]
-    prices = [entry['price'] for entry in valid_entries]
-
-    average_price = sum(prices) / len(prices)
-    lowest_price = min(prices)
-
-    plt.figure(figsize=(10, 5))
-    plt.bar(names, prices, label='Price', color='skyblue')
-    plt.axhline(y=average_price, color='r', linestyle='-', label=f'Average Price: {average_price:.2f}')
-    plt.axhline(y=lowest_price, color='b', linestyle='-', label=f'Lowest Price: {lowest_price:.2f}')
-    plt.xlabel('Station Names')
-    plt.ylabel('Price in $')
-    plt.title('Gas Prices Comparison')
-    plt.xticks(rotation=90)
-    plt.legend()
-    plt.tight_layout()
-
-    graph_filename = f"gas_prices_{datetime.now().strftime('%Y%m%d%H%M%S')}.png"
-    plt.savefig(graph_filename)
-    print(f"Graph saved as {graph_filename}")
-    plt.close()  # Close the plot to prevent display issues
-
-
-# Fetch initial data with BeautifulSoup
-def fetch_initial_data(city_or_postal_code, fuel_type, payment_method):
-    url = f"https://www.gasbuddy.com/home?search={city_or_postal_code}&fuel={fuel_type}&method={payment_method}"
-    response = requests.get(url, headers={'User-Agent': USER_AGENT})
-    if response.status_code == 200:
-        return BeautifulSoup(response.text, 'html.parser')
-    else:
-        logging.error(f"Failed to fetch initial data for {city_or_postal_code}, status code: {response.status_code}")
-        return None
-
-
-# Parse initial data from BeautifulSoup
-def parse_initial_data(soup):
-    gas_prices = []
-    stations = soup.select('.GenericStationListItem-module__stationListItem___3Jmn4')
-    for station in stations:
-        name = station.select_one('.header__header3___1b1oq').text.strip()
-        address = station.select_one('.StationDisplay-module__address___2_c7v').text.strip().replace(' \n', ', ')
-        price = station.select_one('.StationDisplayPrice-module__price___3rARL').text.strip()
-        last_updated_element = station.select_one('.ReportedBy-module__postedTime___J5H9Z')
-        if last_updated_element is not None:
-            last_updated = last_updated_element.text.strip()  # ISO formatted
-        else:
-            last_updated = "N/A"
-
-
-        gas_prices.append({'name': name, 'address': address, 'price': price, 'last_updated': last_updated})
-    return gas_prices
-
-
-# Fetch additional data with GraphQL
-def fetch_additional_gas_prices(city_or_postal_code, fuel_type, cursor="40"):
-    payload = {
-        "operationName": "LocationBySearchTerm",
-        "variables": {
-            "fuel": int(fuel_type),
-            "search": city_or_postal_code,
-            "cursor": cursor
-        },
-        "query": """query LocationBySearchTerm($brandId: Int, $cursor: String, $fuel: Int, $lat: Float, $lng: Float, $maxAge: Int, $search: String) {
-  locationBySearchTerm(lat: $lat, lng: $lng, search: $search) {
-    countryCode
-    displayName
-    latitude
-    longitude
-    regionCode
-    stations(
-      brandId: $brandId
-      cursor: $cursor
-      fuel: $fuel
-      lat: $lat
-      lng: $lng
-      maxAge: $maxAge
-    ) {
-      count
-      cursor {
-        next
-        __typename
-      }
-      results {
-        address {
-          country
-          line1
-          line2
-          locality
-          postalCode
-          region
-          __typename
-        }
-        badges {
-          badgeId
-          callToAction
-          campaignId
-          clickTrackingUrl
-          description
-          detailsImageUrl
-          detailsImpressionTrackingUrls
-          imageUrl
-          impressionTrackingUrls
-          targetUrl
-          title
-          __typename
-        }
-        brands {
-          brandId
-          brandingType
-          imageUrl
-          name
-          __typename
-        }
-        distance
-        emergencyStatus {
-          hasDiesel {
-            nickname
-            reportStatus
-            updateDate
-            __typename
-          }
-          hasGas {
-            nickname
-            reportStatus
-            updateDate
-            __typename
-          }
-          hasPower {
-            nickname
-            reportStatus
-            updateDate
-            __typename
-          }
-          __typename
-        }
-        enterprise
-        fuels
-        hasActiveOutage
-        id
-        name
-        offers {
-          discounts {
-            grades
-            highlight
-            pwgbDiscount
-            receiptDiscount
-            __typename
-          }
-          highlight
-          id
-          types
-          use
-          __typename
-        }
-        payStatus {
-          isPayAvailable
-          __typename
-        }
-        prices {
-          cash {
-            nickname
-            postedTime
-            price
-            formattedPrice
-            __typename
-          }
-          credit {
-            nickname
-            postedTime
-            price
-            formattedPrice
-            __typename
-          }
-          discount
-          fuelProduct
-          __typename
-        }
-        priceUnit
-        ratingsCount
-        starRating
-        __typename
-      }
-      __typename
-    }
-    trends {
-      areaName
-      country
-      today
-      todayLow
-      trend
-      __typename
-    }
-    __typename
-  }
-}
-"""  # Insert the GraphQL query here
-    }
-    response = requests.post(GRAPHQL_URL, json=payload, headers=HEADERS)
-    if response.status_code == 200:
-        return response.json()
-    else:
-        logging.error(f"Failed to fetch additional data for {city_or_postal_code}, status code: {response.status_code}")
-        return None
-
-
-# Parse additional data from GraphQL
-def parse_additional_data(json_data):
-    gas_prices = []
-    if 'data' in json_data and 'locationBySearchTerm' in json_data['data']:
-        stations_data = json_data['data']['locationBySearchTerm']['stations']['results']
-        for station in stations_data:
-            name = station.get('name', 'N/A')
-            address_components = [station['address'].get('line1', ''),
-                                  station['address'].get('locality', ''),
-                                  station['address'].get('region', ''),
-                                  station['address'].get('postalCode', '')]
-            address = ', '.join(filter(None, address_components))
-            prices = station.get('prices', [])
-            price_info, last_updated = 'N/A', 'N/A'
-            for price in prices:
-                if price.get('credit'):
-                    # Ensure formattedPrice is not repeated
-                    price_info = price['credit'].get('formattedPrice', 'N/A')
-                    last_updated_iso = price['credit'].get('postedTime', '')
-                    if last_updated_iso:
-                        last_updated = format_last_updated(last_updated_iso)
-                    break  # Assuming we're interested in the first credit price
-            # If price_info ends with '¢' or '$', we don't append another '¢' or '$'
-            if price_info and not price_info.endswith(('¢', '$')):
-                price_info += '¢' if price_info.isdigit() else ''
-            gas_prices.append({'name': name, 'address': address, 'price': price_info, 'last_updated': last_updated})
-    next_cursor = json_data['data']['locationBySearchTerm']['stations']['cursor'].get('next', None)
-    return gas_prices, next_cursor
-
-
-
 # Save data to file
 def save_to_file(gas_prices, file_type, filename_prefix="gas_prices"):
     # Extract the base name in case a full path is provided
@@ -476,62 +201,34 @@ def save_to_file(gas_prices, file_type, filename_prefix="gas_prices"):
     filename = f"{base_filename}_{timestamp}.{file_type}"
     filepath = os.path.join(os.getcwd(), filename)  # Save in the current working directory
     try:
-        if file_type == 'csv':
-            with open(filepath, 'w', newline='', encoding='utf-8') as file:
-                writer = csv.DictWriter(file, fieldnames=['name', 'address', 'price', 'last_updated'])
-                writer.writeheader()
-                writer.writerows(gas_prices)
-        elif file_type == 'txt':
-            with open(filepath, 'w', encoding='utf-8') as file:
-                for gas_price in gas_prices:
-                    file.write(
-                        f"{gas_price['name']}, {gas_price['address']}, {gas_price['price']}, {gas_price['last_updated']}\n")
+        write_gas_prices(filepath, gas_prices, file_type)
         print(f"Data successfully saved to {filename}")
         return filepath  # Return the full path to the saved file
-    except IOError as e:
+    except (IOError, ImportError) as e:
         logging.error(f"Failed to save data to file: {e}")
         return None
 
 
-def format_last_updated(posted_time):
-    # Parse the ISO formatted datetime
-    posted_datetime = datetime.fromisoformat(posted_time.rstrip('Z')).replace(tzinfo=timezone.utc)
-    # Get the current time in UTC
-    now_datetime = datetime.now(timezone.utc)
-    # Calculate the difference in time
-    time_diff = now_datetime - posted_datetime
-    # Convert the time difference to hours
-    hours_diff = time_diff.total_seconds() / 3600
-
-    # If the difference is less than 24 hours, return the number of hours
-    if hours_diff < 24:
-        # Round down to the nearest whole number
-        hours_ago = int(hours_diff)
-        return f"{hours_ago} hours ago" if hours_ago > 0 else "Less than an hour ago"
-    else:
-        # For periods longer than 24 hours, return the actual date
-        return posted_datetime.strftime('%Y-%m-%d')
-
-
+# Read data from a file of the given file type, returns None if the file could not be read
 def read_gas_prices_from_file(file_type, filename):
     gas_prices = []
     try:
-        with open(filename, 'r', newline='', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                row['price'] = convert_price(row['price'])
-                gas_prices.append(row)
-    except IOError as e:
+        for row in iter_gas_prices(filename, file_type):
+            row['price'] = convert_price(row['price'])
+            gas_prices.append(row)
+    except (IOError, ImportError, ValueError) as e:
         logging.error(f"Failed to read data from file: {e}")
+        print(f"Failed to read {filename} as {file_type}: {e}")
+        return None
     return gas_prices
 
 
 # Function to sort data from a file
 def sort_data_from_file():
-    file_type = input("Enter the file type (csv/txt) you want to sort: ").strip().lower()
+    file_type = input(f"Enter the file type ({FILE_TYPE_CHOICES}) you want to sort: ").strip().lower()
     # validate the file type
-    if file_type not in ['csv', 'txt']:
-        print("Invalid file type. Please enter 'csv' or 'txt'.")
+    if file_type not in FILE_TYPES:
+        print(INVALID_FILE_TYPE)
         return
     filepath = input("Enter the filename (including path) of the data to sort: ").strip()
 
@@ -541,6 +238,8 @@ def sort_data_from_file():
 
     filename = os.path.basename(filepath)  # Extract the base filename
     gas_prices = read_gas_prices_from_file(file_type, filepath)
+    if gas_prices is None:
+        return
     sort_choice = input("Choose the field to sort by (name/price/last_updated): ").strip().lower()
     ascending = input("Should the data be sorted in ascending order? (yes/no): ").strip().lower() == 'yes'
     sorted_gas_prices = sort_gas_prices(gas_prices, sort_by=sort_choice, ascending=ascending)
@@ -553,10 +252,10 @@ def sort_data_from_file():
 
 # Function to graph data from a file
 def graph_data_from_file():
-    file_type = input("Enter the file type (csv/txt) of the data to graph: ").strip().lower()
+    file_type = input(f"Enter the file type ({FILE_TYPE_CHOICES}) of the data to graph: ").strip().lower()
     # validate the file type
-    if file_type not in ['csv', 'txt']:
-        print("Invalid file type. Please enter 'csv' or 'txt'.")
+    if file_type not in FILE_TYPES:
+        print(INVALID_FILE_TYPE)
         return
     
     filename = input("Enter the filename (including path) of the data to graph: ").strip()
@@ -566,7 +265,9 @@ def graph_data_from_file():
         return
 
     gas_prices = read_gas_prices_from_file(file_type, filename)
-    plot_gas_prices(gas_prices)
+    if gas_prices is None:
+        return
+    graph_data(gas_prices)
     print("Graph generated successfully.")
 
 
@@ -574,46 +275,20 @@ def graph_data_from_file():
 def get_menu_choice():
     while True:
         print("\nPlease choose an option:")
-        choice = input("Enter 'h' for help or a number between 1-6 to select an action: ").strip().lower()
-        if choice in ['h', '1', '2', '3', '4', '5', '6']:
+        choice = input("Enter 'h' for help or a number between 1-9 to select an action: ").strip().lower()
+        if choice in ['h', '1', '2', '3', '4', '5', '6', '7', '8', '9']:
             return choice
         else:
-            print("Invalid input. Please enter 'h' for help or a number between 1-6.")
-
-
-# Function to display menu and get user choice
-def convert_price(price_str):
-    try:
-        # Remove any non-numeric characters before conversion
-        price = float(''.join(filter(str.isdigit, price_str)))
-        return price / 10  # it should return the price correclty so if it was 129.9 it should be returend as 129.9
-    except ValueError:
-        return None
-
-
-# Function to convert last updated time to datetime object
-def convert_last_updated(last_updated):
-    try:
-        # Directly return datetime object if already in ISO format
-        if "-" in last_updated:
-            return datetime.strptime(last_updated, "%Y-%m-%d")
-        # Handle 'X hours ago' format by calculating the datetime
-        elif "hours ago" in last_updated:
-            hours = int(last_updated.split(" ")[0])
-            return datetime.now() - timedelta(hours=hours)
-    except Exception as e:
-        # Log error and return a default date in case of parsing failure
-        logging.error(f"Error converting last updated time: {e}")
-        return datetime.min
+            print("Invalid input. Please enter 'h' for help or a number between 1-9.")
 
 
 # Function to calculate the total price to fill specific amount of fuel or tank provided by the user and add it to the csv file
 def calculate_total_price_to_fill():
     file_type = input(
-        "Enter the file type (csv/txt) of the data to calculate the total price to fill: ").strip().lower()
+        f"Enter the file type ({FILE_TYPE_CHOICES}) of the data to calculate the total price to fill: ").strip().lower()
     # validate the file type
-    if file_type not in ['csv', 'txt']:
-        print("Invalid file type. Please enter 'csv' or 'txt'.")
+    if file_type not in FILE_TYPES:
+        print(INVALID_FILE_TYPE)
         return
     filename = input("Enter the filename (including path) of the data to calculate the total price to fill: ").strip()
 
@@ -622,27 +297,20 @@ def calculate_total_price_to_fill():
         return
 
     # read the gas prices for the first row from the file and make sure if it is in dollars or cents by looking for the dollar sign, if there is no sign we assume it is in cents
-    if file_type == 'csv':
-        with open(filename, 'r', newline='', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if '$' in row['price']:
-                    # assign a variable to know if the price is in dollars or cents
-                    dollars = True
-                    break
-                else:
-                    dollars = False
-                    break
-    # if the file type is txt we should read the first line and check if it is in dollars or cents
-    else:
-        with open(filename, 'r', encoding='utf-8') as file:
-            first_line = file.readline()
-            if '$' in first_line:
-                dollars = True
-            else:
-                dollars = False
+    try:
+        rows = iter_gas_prices(filename, file_type)
+        first_row = next(rows, None)
+        rows.close()
+    except (IOError, ImportError, ValueError) as e:
+        logging.error(f"Failed to read data from file: {e}")
+        print(f"Failed to read {filename} as {file_type}: {e}")
+        return
+    # assign a variable to know if the price is in dollars or cents
+    dollars = first_row is not None and '$' in first_row['price']
 
     gas_prices = read_gas_prices_from_file(file_type, filename)
+    if gas_prices is None:
+        return
     # calculate the total price to fill specific amount of fuel or tank
     total_price = 0
     while True:
@@ -671,7 +339,7 @@ def calculate_total_price_to_fill():
                         print("Invalid input. Please enter 'b' for British gallons or 'a' for American gallons.")
                     # we should add something to know if it us and insert gallon in the csv file
                 if gallons == 'b':
-                    amount = amount * 4.54609
+                    amount = amount * UK_GALLON_IN_LITERS
                     unit = 'l'
                 else:
                     unit = 'gal'
@@ -696,21 +364,14 @@ def calculate_total_price_to_fill():
         if dollars:
             # dvide the entry of price by 10 since there was an issue when reading it shows 26.6 instead of 2.66
             entry['price'] = entry['price'] / 10
+            entry['Total Price'] = fill_cost(entry['price'], dollars, amount, unit, tax)
             # add a dollar sign to the price
-            entry['Total Price'] = amount * entry['price']
             entry['price'] = f"${entry['price']:.2f}"
-            if unit == 'l':
-                entry['Total Price'] = entry['Total Price'] / 3.78541
-            entry['Total Price'] = entry['Total Price'] + (entry['Total Price'] * tax)
-            entry['Total Price'] = f"${entry['Total Price']:.2f}"
         else:
-            entry['Total Price'] = amount * entry['price']
+            entry['Total Price'] = fill_cost(entry['price'], dollars, amount, unit, tax)
             # add a cent sign to the price
             entry['price'] = f"{entry['price']}¢"
-            if unit == 'l':
-                entry['Total Price'] = entry['Total Price'] / 100
-            entry['Total Price'] = entry['Total Price'] + (entry['Total Price'] * tax)
-            entry['Total Price'] = f"${entry['Total Price']:.2f}"
+        entry['Total Price'] = f"${entry['Total Price']:.2f}"
         # calculate the tax
         entry['Tax'] = f"{tax * 100}%"  # Add tax as a percentage
         entry['Filled'] = f"{amount} {unit}"  # Add the amount and unit of fuel/tank
@@ -718,32 +379,158 @@ def calculate_total_price_to_fill():
     # Saving the file with the new columns "Total Price", "Tax", and "Liters"
     total_price_filename = f"Total_Price_{filename}"
     try:
-        # If the file type is CSV
-        if file_type == 'csv':
-            with open(total_price_filename, 'w', newline='', encoding='utf-8') as file:
-                writer = csv.DictWriter(file, fieldnames=['name', 'address', 'price', 'last_updated', 'Tax', 'Filled',
-                                                          'Total Price'])
-                writer.writeheader()
-                writer.writerows(gas_prices)
-
-        # If the file type is TXT
-        elif file_type == 'txt':
-            with open(total_price_filename, 'w', encoding='utf-8') as file:
-                for gas_price in gas_prices:
-                    file.write(
-                        f"{gas_price['name']}, {gas_price['address']}, {gas_price['price']}, {gas_price['last_updated']}, {gas_price['Tax']}, {gas_price['Filled']}, {gas_price['Total Price']}\n")
-
+        write_gas_prices(total_price_filename, gas_prices, file_type,
+                         fieldnames=['name', 'address', 'price', 'last_updated', 'Tax', 'Filled', 'Total Price'])
         print(f"Data successfully saved to {total_price_filename}")
         return total_price_filename  # Return the full path to the saved file
 
     # If an IOError occurs (e.g., the file cannot be opened)
-    except IOError as e:
+    except (IOError, ImportError) as e:
         logging.error(f"Failed to save data to file: {e}")
         return None
 
 
+# Function to get user input for the query server
+def get_server_input():
+    while True:
+        regions = [region.strip() for region in input("Enter cities or postal codes to serve (comma separated): ").split(',')]
+        regions = [region for region in regions if region]
+        if not regions:
+            print("At least one city or postal code is required. Please try again.")
+            continue
+        break
+
+    while True:
+        fuel_input = input("Enter fuel types to serve (comma separated numbers 1-6 or fuel names): ").strip().lower()
+        fuel_types = [normalize_fuel(fuel) for fuel in fuel_input.split(',') if fuel.strip()]
+        if not fuel_types or any(fuel not in ['1', '2', '3', '4', '5', '6'] for fuel in fuel_types):
+            print("Invalid fuel type. Please enter numbers between 1-6 or the corresponding fuel names.")
+            continue
+        break
+
+    while True:
+        payment_method = input("Choose payment method (all/credit): ").strip().lower()
+        if payment_method not in ['all', 'credit']:
+            print("Invalid payment method. Please enter 'all' or 'credit'.")
+            continue
+        break
+
+    while True:
+        try:
+            total_pages = int(input("Enter the total number of pages to fetch: ").strip())
+            port = int(input("Enter the port to listen on (e.g. 8080): ").strip())
+            refresh_minutes = float(input("Enter the refresh interval in minutes: ").strip())
+            if total_pages < 0 or not 0 < port < 65536 or refresh_minutes <= 0:
+                raise ValueError
+        except ValueError:
+            print("Invalid input. Please enter positive numbers and a port between 1-65535.")
+            continue
+        break
+
+    targets = [(region, fuel) for region in regions for fuel in fuel_types]
+    return targets, payment_method, total_pages, port, refresh_minutes * 60
+
+
+# Function to run the query server until it is interrupted
+def serve_data():
+    from server import serve
+
+    targets, payment_method, total_pages, port, refresh_interval = get_server_input()
+    serve(targets, payment_method, total_pages, port=port, refresh_interval=refresh_interval)
+
+
+# Function to scrape data while checking each row against alert rules from a file
+def scrape_with_alerts():
+    from alerts import AlertEngine, file_sink, load_rules, stdout_sink, webhook_sink
+
+    rules_filename = input("Enter the filename (including path) of the alert rules (JSON): ").strip()
+    if not file_exists(rules_filename):
+        print(f"File {rules_filename} not found.")
+        return
+    try:
+        rules = load_rules(rules_filename)
+    except (IOError, ValueError) as e:
+        print(f"Invalid alert rules: {e}")
+        return
+
+    while True:
+        sink_choice = input("Send alerts to (stdout/file/webhook): ").strip().lower()
+        if sink_choice not in ['stdout', 'file', 'webhook']:
+            print("Invalid choice. Please enter 'stdout', 'file' or 'webhook'.")
+            continue
+        break
+    if sink_choice == 'file':
+        sink = file_sink(input("Enter the filename to append alerts to: ").strip())
+    elif sink_choice == 'webhook':
+        sink = webhook_sink(input("Enter the webhook URL: ").strip())
+    else:
+        sink = stdout_sink
+
+    # Last seen prices are kept next to the rules so price drops are found across runs
+    engine = AlertEngine(rules, [sink], state_filename=f"{os.path.splitext(rules_filename)[0]}_state.json")
+    city_or_postal_code, fuel_type, payment_method, file_type, total_pages = get_scraping_input()
+    all_gas_prices = scrape_data(city_or_postal_code, fuel_type, payment_method, total_pages,
+                                 on_row=engine.watch(city_or_postal_code, fuel_type),
+                                 with_distance=engine.needs_distance)
+    engine.finish_scrape()
+    if all_gas_prices:
+        save_to_file(all_gas_prices, file_type, "scraped_gas_prices")
+        print("Data scraped and saved successfully.")
+
+
+# Function to scrape data and rank the stations for every vehicle of a fleet by effective cost
+def rank_fleet():
+    from fleet import RANKING_FIELDNAMES, load_vehicles, rank_effective_cost
+
+    vehicles_filename = input("Enter the filename (including path) of the vehicles (JSON): ").strip()
+    if not file_exists(vehicles_filename):
+        print(f"File {vehicles_filename} not found.")
+        return
+    try:
+        vehicles = load_vehicles(vehicles_filename)
+    except (IOError, ValueError) as e:
+        print(f"Invalid vehicles: {e}")
+        return
+
+    while True:
+        try:
+            tax = float(input("Enter the tax in your area: ").strip())
+            top_k = int(input("Enter the number of stations to rank per vehicle: ").strip())
+            if tax < 0 or top_k < 1:
+                raise ValueError
+        except ValueError:
+            print("Invalid input. Please enter positive numbers.")
+            continue
+        break
+
+    city_or_postal_code, fuel_type, payment_method, file_type, total_pages = get_scraping_input()
+    all_gas_prices = scrape_data(city_or_postal_code, fuel_type, payment_method, total_pages, with_distance=True)
+    if not all_gas_prices:
+        return
+
+    rankings, skipped = rank_effective_cost(all_gas_prices, vehicles, tax / 100, top_k)
+    if skipped:
+        print(f"{skipped} of {len(all_gas_prices)} stations have no price or distance and were left out.")
+    for vehicle, ranking in zip(vehicles, rankings):
+        print(f"\n{vehicle['name']}:")
+        if not ranking:
+            print("No stations with a price and distance to rank.")
+        for entry in ranking:
+            print(f"{entry['rank']}. {entry['name']}, {entry['address']} - {entry['price']}, {entry['distance']} away, "
+                  f"effective cost {entry['Effective Cost']} (fill {entry['Fill Cost']} + trip {entry['Trip Cost']})")
+
+    ranking_filename = f"fleet_ranking_{datetime.now().strftime('%Y%m%d%H%M%S')}.{file_type}"
+    try:
+        write_gas_prices(ranking_filename, [entry for ranking in rankings for entry in ranking], file_type,
+                         fieldnames=RANKING_FIELDNAMES)
+        print(f"Data successfully saved to {ranking_filename}")
+    except (IOError, ImportError) as e:
+        logging.error(f"Failed to save data to file: {e}")
+
+
 # Main function to orchestrate the scraping process
 def main():
+    configure_logging()
     welcome_message()
     while True:
         choice = get_menu_choice()
@@ -772,8 +559,17 @@ def main():
         elif choice == '6':
             print("Exiting the program.")
             break
+        elif choice == '7':
+            # Serve the latest scraped prices over HTTP
+            serve_data()
+        elif choice == '8':
+            # Scrape data and check every row against the alert rules as it comes in
+            scrape_with_alerts()
+        elif choice == '9':
+            # Rank stations for each vehicle by fill cost plus the fuel burned getting there
+            rank_fleet()
         else:
-            print("Invalid choice. Please enter 'h' for help or a number between 1-6 to select an action.")
+            print("Invalid choice. Please enter 'h' for help or a number between 1-9 to select an action.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,91 @@
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+# Prices look like '$3.45', '129.9¢' or 'N/A', a price without a sign is in cents
+_PRICE_DIGITS_RE = re.compile(r'\$?(\d+)(?:\.(\d+))?¢?')
+_DOLLARS_RE = re.compile(r'\$(\d+)(?:\.(\d+))?')
+_CENTS_RE = re.compile(r'(\d+)(?:\.(\d+))?¢?')
+# Prices and post times repeat a lot across stations and pages, so their parses are kept around
+CACHE_SIZE = 8192
+
+
+# Function to convert a price string to the number used when sorting and graphing, '$3.45' is 34.5 and '129.9¢' is 129.9
+@lru_cache(maxsize=CACHE_SIZE)
+def convert_price(price_str):
+    if price_str == 'N/A':
+        return None
+    match = _PRICE_DIGITS_RE.fullmatch(price_str)
+    if match:
+        whole, fraction = match.groups()
+        return float(whole + (fraction or '')) / 10
+    try:
+        # Remove any non-numeric characters before conversion
+        price = float(''.join(filter(str.isdigit, price_str)))
+        return price / 10  # it should return the price correclty so if it was 129.9 it should be returend as 129.9
+    except ValueError:
+        return None
+
+
+# Function to convert a price string to an integer amount of milli-dollars, '$3.45' is 3450 and '129.9¢' is 1299
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_price_millis(price_str):
+    price_str = price_str.strip()
+    match = _DOLLARS_RE.fullmatch(price_str)
+    if match:
+        whole, fraction = match.groups()
+        return int(whole) * 1000 + int((fraction or '').ljust(3, '0')[:3])
+    match = _CENTS_RE.fullmatch(price_str)
+    if match:
+        whole, fraction = match.groups()
+        return int(whole) * 10 + int((fraction or '0')[0])
+    return None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _parse_posted_time(posted_time):
+    # Parse the ISO formatted datetime
+    posted_datetime = datetime.fromisoformat(posted_time.rstrip('Z')).replace(tzinfo=timezone.utc)
+    return posted_datetime, posted_datetime.strftime('%Y-%m-%d')
+
+
+# Function to format last updated time, pass now when formatting many rows so the clock is read once
+def format_last_updated(posted_time, now=None):
+    posted_datetime, posted_date = _parse_posted_time(posted_time)
+    # Get the current time in UTC
+    now_datetime = now or datetime.now(timezone.utc)
+    # Calculate the difference in time
+    time_diff = now_datetime - posted_datetime
+    # Convert the time difference to hours
+    hours_diff = time_diff.total_seconds() / 3600
+
+    # If the difference is less than 24 hours, return the number of hours
+    if hours_diff < 24:
+        # Round down to the nearest whole number
+        hours_ago = int(hours_diff)
+        return f"{hours_ago} hours ago" if hours_ago > 0 else "Less than an hour ago"
+    else:
+        # For periods longer than 24 hours, return the actual date
+        return posted_date
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _parse_date(date_str):
+    return datetime.strptime(date_str, "%Y-%m-%d")
+
+
+# Function to convert last updated time to datetime object, pass now when converting many rows so the clock is read once
+def convert_last_updated(last_updated, now=None):
+    try:
+        # Directly return datetime object if already in ISO format
+        if "-" in last_updated:
+            return _parse_date(last_updated)
+        # Handle 'X hours ago' format by calculating the datetime
+        elif "hours ago" in last_updated:
+            hours = int(last_updated.split(" ")[0])
+            return (now or datetime.now()) - timedelta(hours=hours)
+    except Exception as e:
+        # Log error and return a default date in case of parsing failure
+        logging.error(f"Error converting last updated time: {e}")
+        return datetime.min
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+
+# Plot gas prices
+def plot_gas_prices(gas_prices):
+    import matplotlib.pyplot as plt
+
+    # Convert price strings to floats and filter out invalid entries
+    valid_entries = [entry for entry in gas_prices if isinstance(entry['price'], float)]
+
+    if not valid_entries:
+        print("No valid prices available for graphing.")
+        return
+
+    names = [entry['name'] for entry in valid_entries]
+    prices = [entry['price'] for entry in valid_entries]
+
+    average_price = sum(prices) / len(prices)
+    lowest_price = min(prices)
+
+    plt.figure(figsize=(10, 5))
+    plt.bar(names, prices, label='Price', color='skyblue')
+    plt.axhline(y=average_price, color='r', linestyle='-', label=f'Average Price: {average_price:.2f}')
+    plt.axhline(y=lowest_price, color='b', linestyle='-', label=f'Lowest Price: {lowest_price:.2f}')
+    plt.xlabel('Station Names')
+    plt.ylabel('Price in $')
+    plt.title('Gas Prices Comparison')
+    plt.xticks(rotation=90)
+    plt.legend()
+    plt.tight_layout()
+
+    graph_filename = f"gas_prices_{datetime.now().strftime('%Y%m%d%H%M%S')}.png"
+    plt.savefig(graph_filename)
+    print(f"Graph saved as {graph_filename}")
+    plt.close()  # Close the plot to prevent display issues
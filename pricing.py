@@ -0,0 +1,38 @@
+from parsing import convert_price
+
+FUEL_TYPES = {'regular': '1', 'midgrade': '2', 'premium': '3', 'diesel': '4', 'e85': '5', 'unl88': '6'}
+UK_GALLON_IN_LITERS = 4.54609
+US_GALLON_IN_LITERS = 3.78541
+
+
+# Function to turn a fuel name or number into the fuel number used by the scraper
+def normalize_fuel(fuel):
+    fuel = fuel.strip().lower()
+    return FUEL_TYPES.get(fuel, fuel)
+
+
+# Function to get the price of a station as a number and whether it is in dollars or cents
+def station_price(price_str):
+    price = convert_price(price_str)
+    if price is None:
+        return None, False
+    if '$' in price_str:
+        # same correction as the cost to fill, 26.6 is read for $2.66
+        return price / 10, True
+    return price, False
+
+
+# Function to get what amount * price is divided by to get dollars, prices per gallon are converted for liters
+# and cents are converted to dollars
+def fill_unit_divisor(dollars, unit):
+    if unit != 'l':
+        return 1
+    return US_GALLON_IN_LITERS if dollars else 100
+
+
+# Function to calculate the total price with tax to fill an amount of fuel at a single station price
+def fill_cost(price, dollars, amount, unit, tax):
+    total = amount * price
+    if unit == 'l':
+        total = total / fill_unit_divisor(dollars, unit)
+    return total + (total * tax)
@@ -0,0 +1,269 @@
+import logging
+from datetime import datetime, timezone
+
+from parsing import format_last_updated
+
+# Constants
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
+GRAPHQL_URL = 'https://www.gasbuddy.com/graphql'
+HEADERS = {'User-Agent': USER_AGENT, 'Content-Type': 'application/json'}
+
+
+# Function to scrape data, on_row is called with every row as soon as it is parsed. with_distance fetches the first
+# page through GraphQL too since the HTML page has no station distances, that page then ignores the payment method
+def scrape_data(city_or_postal_code, fuel_type, payment_method, total_pages, on_row=None, with_distance=False):
+    all_gas_prices = []
+
+    # Fetch and parse initial page
+    if with_distance:
+        json_data = fetch_additional_gas_prices(city_or_postal_code, fuel_type, "0")  # cursors are station offsets
+        if not json_data:
+            print("Failed to retrieve initial data. Please check your internet connection and try again.")
+            return None
+        initial_data, cursor = parse_additional_data(json_data, on_row)
+    else:
+        initial_soup = fetch_initial_data(city_or_postal_code, fuel_type, payment_method)
+        if not initial_soup:
+            print("Failed to retrieve initial data. Please check your internet connection and try again.")
+            return None
+        initial_data = parse_initial_data(initial_soup, on_row)
+        cursor = "40"  # Starting cursor for the second page
+    all_gas_prices.extend(initial_data)
+
+    # Fetch and parse additional pages if requested
+    for _ in range(2, total_pages + 1):
+        if not cursor:
+            break  # No more stations
+        json_data = fetch_additional_gas_prices(city_or_postal_code, fuel_type, cursor)
+        if json_data:
+            additional_data, cursor = parse_additional_data(json_data, on_row)
+            all_gas_prices.extend(additional_data)
+        else:
+            break  # Exit loop if data fetching fails
+
+    return all_gas_prices
+
+
+# Fetch initial data with BeautifulSoup
+def fetch_initial_data(city_or_postal_code, fuel_type, payment_method):
+    import requests
+    from bs4 import BeautifulSoup
+
+    url = f"https://www.gasbuddy.com/home?search={city_or_postal_code}&fuel={fuel_type}&method={payment_method}"
+    response = requests.get(url, headers={'User-Agent': USER_AGENT})
+    if response.status_code == 200:
+        return BeautifulSoup(response.text, 'html.parser')
+    else:
+        logging.error(f"Failed to fetch initial data for {city_or_postal_code}, status code: {response.status_code}")
+        return None
+
+
+# Parse initial data from BeautifulSoup
+def parse_initial_data(soup, on_row=None):
+    gas_prices = []
+    stations = soup.select('.GenericStationListItem-module__stationListItem___3Jmn4')
+    for station in stations:
+        name = station.select_one('.header__header3___1b1oq').text.strip()
+        address = station.select_one('.StationDisplay-module__address___2_c7v').text.strip().replace(' \n', ', ')
+        price = station.select_one('.StationDisplayPrice-module__price___3rARL').text.strip()
+        last_updated_element = station.select_one('.ReportedBy-module__postedTime___J5H9Z')
+        if last_updated_element is not None:
+            last_updated = last_updated_element.text.strip()  # ISO formatted
+        else:
+            last_updated = "N/A"
+
+
+        gas_price = {'name': name, 'address': address, 'price': price, 'last_updated': last_updated}
+        gas_prices.append(gas_price)
+        if on_row:
+            on_row(gas_price)
+    return gas_prices
+
+
+# Fetch additional data with GraphQL
+def fetch_additional_gas_prices(city_or_postal_code, fuel_type, cursor="40"):
+    import requests
+
+    payload = {
+        "operationName": "LocationBySearchTerm",
+        "variables": {
+            "fuel": int(fuel_type),
+            "search": city_or_postal_code,
+            "cursor": cursor
+        },
+        "query": """query LocationBySearchTerm($brandId: Int, $cursor: String, $fuel: Int, $lat: Float, $lng: Float, $maxAge: Int, $search: String) {
+  locationBySearchTerm(lat: $lat, lng: $lng, search: $search) {
+    countryCode
+    displayName
+    latitude
+    longitude
+    regionCode
+    stations(
+      brandId: $brandId
+      cursor: $cursor
+      fuel: $fuel
+      lat: $lat
+      lng: $lng
+      maxAge: $maxAge
+    ) {
+      count
+      cursor {
+        next
+        __typename
+      }
+      results {
+        address {
+          country
+          line1
+          line2
+          locality
+          postalCode
+          region
+          __typename
+        }
+        badges {
+          badgeId
+          callToAction
+          campaignId
+          clickTrackingUrl
+          description
+          detailsImageUrl
+          detailsImpressionTrackingUrls
+          imageUrl
+          impressionTrackingUrls
+          targetUrl
+          title
+          __typename
+        }
+        brands {
+          brandId
+          brandingType
+          imageUrl
+          name
+          __typename
+        }
+        distance
+        emergencyStatus {
+          hasDiesel {
+            nickname
+            reportStatus
+            updateDate
+            __typename
+          }
+          hasGas {
+            nickname
+            reportStatus
+            updateDate
+            __typename
+          }
+          hasPower {
+            nickname
+            reportStatus
+            updateDate
+            __typename
+          }
+          __typename
+        }
+        enterprise
+        fuels
+        hasActiveOutage
+        id
+        name
+        offers {
+          discounts {
+            grades
+            highlight
+            pwgbDiscount
+            receiptDiscount
+            __typename
+          }
+          highlight
+          id
+          types
+          use
+          __typename
+        }
+        payStatus {
+          isPayAvailable
+          __typename
+        }
+        prices {
+          cash {
+            nickname
+            postedTime
+            price
+            formattedPrice
+            __typename
+          }
+          credit {
+            nickname
+            postedTime
+            price
+            formattedPrice
+            __typename
+          }
+          discount
+          fuelProduct
+          __typename
+        }
+        priceUnit
+        ratingsCount
+        starRating
+        __typename
+      }
+      __typename
+    }
+    trends {
+      areaName
+      country
+      today
+      todayLow
+      trend
+      __typename
+    }
+    __typename
+  }
+}
+"""  # Insert the GraphQL query here
+    }
+    response = requests.post(GRAPHQL_URL, json=payload, headers=HEADERS)
+    if response.status_code == 200:
+        return response.json()
+    else:
+        logging.error(f"Failed to fetch additional data for {city_or_postal_code}, status code: {response.status_code}")
+        return None
+
+
+# Parse additional data from GraphQL
+def parse_additional_data(json_data, on_row=None):
+    gas_prices = []
+    if 'data' in json_data and 'locationBySearchTerm' in json_data['data']:
+        stations_data = json_data['data']['locationBySearchTerm']['stations']['results']
+        now = datetime.now(timezone.utc)
+        for station in stations_data:
+            name = station.get('name', 'N/A')
+            address_components = [station['address'].get('line1', ''),
+                                  station['address'].get('locality', ''),
+                                  station['address'].get('region', ''),
+                                  station['address'].get('postalCode', '')]
+            address = ', '.join(filter(None, address_components))
+            prices = station.get('prices', [])
+            price_info, last_updated = 'N/A', 'N/A'
+            for price in prices:
+                if price.get('credit'):
+                    # Ensure formattedPrice is not repeated
+                    price_info = price['credit'].get('formattedPrice', 'N/A')
+                    last_updated_iso = price['credit'].get('postedTime', '')
+                    if last_updated_iso:
+                        last_updated = format_last_updated(last_updated_iso, now)
+                    break  # Assuming we're interested in the first credit price
+            # If price_info ends with '¢' or '$', we don't append another '¢' or '$'
+            if price_info and not price_info.endswith(('¢', '$')):
+                price_info += '¢' if price_info.isdigit() else ''
+            gas_price = {'name': name, 'address': address, 'price': price_info, 'last_updated': last_updated,
+                         'distance': station.get('distance')}
+            gas_prices.append(gas_price)
+            if on_row:
+                on_row(gas_price)
+    next_cursor = json_data['data']['locationBySearchTerm']['stations']['cursor'].get('next', None)
+    return gas_prices, next_cursor
@@ -0,0 +1,287 @@
+import hashlib
+import heapq
+import json
+import logging
+import math
+import threading
+from bisect import bisect_right
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from parsing import parse_price_millis
+from pricing import UK_GALLON_IN_LITERS, fill_cost, normalize_fuel, station_price
+from scraper import scrape_data
+
+DEFAULT_RESULTS = 5
+MAX_RESULTS = 100
+# Cap on cached response bodies, the cache is dropped whenever it fills up or the data is refreshed
+MAX_CACHED_RESPONSES = 4096
+# Largest number a query parameter may hold, so prices and costs worked out from it stay finite
+MAX_NUMBER = 1e9
+
+
+# Prices of one region and fuel, sorted by price so the cheapest stations are a slice away
+class RegionPrices:
+    def __init__(self, gas_prices, refreshed_at):
+        entries = []
+        for gas_price in gas_prices:
+            price, dollars = station_price(gas_price['price'])
+            price_millis = parse_price_millis(gas_price['price'])
+            if price is None or price_millis is None:
+                continue
+            entries.append({
+                'name': gas_price['name'],
+                'address': gas_price['address'],
+                'price': gas_price['price'],
+                'last_updated': gas_price['last_updated'],
+                'price_value': price,
+                'dollars': dollars,
+                # milli-dollars per unit so cents and dollars listings sort together
+                'sort_price': price_millis,
+            })
+        entries.sort(key=lambda entry: entry['sort_price'])
+        self.entries = entries
+        self.sort_prices = [entry['sort_price'] for entry in entries]
+        self.refreshed_at = refreshed_at
+
+
+# One version of the index together with the responses built from it, so a response is never cached against
+# data it was not built from
+class IndexSnapshot:
+    def __init__(self, regions):
+        self._regions = regions
+        self._responses = {}
+
+    def get(self, region, fuel):
+        return self._regions.get((region.lower(), fuel))
+
+    def regions(self):
+        return self._regions
+
+    def cached_response(self, key):
+        return self._responses.get(key)
+
+    def cache_response(self, key, response):
+        responses = self._responses
+        if len(responses) >= MAX_CACHED_RESPONSES:
+            responses.clear()
+        responses[key] = response
+
+
+# In-memory index of the latest scraped rows keyed by (region, fuel)
+class PriceIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = IndexSnapshot({})
+
+    def replace(self, region, fuel, gas_prices):
+        region_prices = RegionPrices(gas_prices, datetime.now(timezone.utc).isoformat())
+        with self._lock:
+            # Swap in a new snapshot so readers never see a half updated index or a stale response cache
+            regions = dict(self._snapshot.regions())
+            regions[(region.lower(), fuel)] = region_prices
+            self._snapshot = IndexSnapshot(regions)
+
+    def snapshot(self):
+        return self._snapshot
+
+
+# Error raised for queries that cannot be answered, carries the HTTP status to send back
+class QueryError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _public_entry(entry):
+    return {'name': entry['name'], 'address': entry['address'], 'price': entry['price'],
+            'last_updated': entry['last_updated'], 'price_value': entry['price_value']}
+
+
+def _get_param(params, name, default=None):
+    values = params.get(name)
+    if not values:
+        if default is None:
+            raise QueryError(400, f"Missing query parameter '{name}'")
+        return default
+    return values[0]
+
+
+def _get_number(params, name, default=None, cast=float):
+    value = _get_param(params, name, default)
+    try:
+        number = cast(value)
+    except (TypeError, ValueError):
+        raise QueryError(400, f"Query parameter '{name}' must be a number")
+    if not math.isfinite(number):
+        raise QueryError(400, f"Query parameter '{name}' must be a finite number")
+    if number < 0 or number > MAX_NUMBER:
+        raise QueryError(400, f"Query parameter '{name}' must be a positive number up to {MAX_NUMBER:g}")
+    return number
+
+
+def _get_region_prices(index, params):
+    region = _get_param(params, 'region')
+    fuel = normalize_fuel(_get_param(params, 'fuel'))
+    region_prices = index.get(region, fuel)
+    if region_prices is None:
+        raise QueryError(404, f"No data for region '{region}' and fuel '{fuel}'")
+    return region, fuel, region_prices
+
+
+def _get_limit(params, name='n'):
+    return min(_get_number(params, name, DEFAULT_RESULTS, int), MAX_RESULTS)
+
+
+# Query: the N cheapest stations of a region and fuel
+def query_cheapest(index, params):
+    region, fuel, region_prices = _get_region_prices(index, params)
+    limit = _get_limit(params)
+    return {'region': region, 'fuel': fuel, 'refreshed_at': region_prices.refreshed_at,
+            'stations': [_public_entry(entry) for entry in region_prices.entries[:limit]]}
+
+
+# Query: stations of a region and fuel filtered by maximum price (in $ per unit) and station name
+def query_stations(index, params):
+    region, fuel, region_prices = _get_region_prices(index, params)
+    limit = _get_limit(params, 'limit')
+    entries = region_prices.entries
+    if 'max_price' in params:
+        max_price_millis = round(_get_number(params, 'max_price') * 1000)
+        entries = entries[:bisect_right(region_prices.sort_prices, max_price_millis)]
+    if 'name' in params:
+        name = _get_param(params, 'name').lower()
+        entries = [entry for entry in entries if name in entry['name'].lower()]
+    return {'region': region, 'fuel': fuel, 'refreshed_at': region_prices.refreshed_at, 'count': len(entries),
+            'stations': [_public_entry(entry) for entry in entries[:limit]]}
+
+
+# Query: the N cheapest stations to fill an amount of fuel, same maths as the cost to fill menu option
+def query_fill(index, params):
+    region, fuel, region_prices = _get_region_prices(index, params)
+    limit = _get_limit(params)
+    amount = _get_number(params, 'amount')
+    unit = _get_param(params, 'unit', 'gal').lower()
+    tax = _get_number(params, 'tax', '0') / 100
+    if unit not in ['l', 'gal', 'b']:
+        raise QueryError(400, "Query parameter 'unit' must be 'l', 'gal' or 'b' (British gallons)")
+    if unit == 'b':
+        amount = amount * UK_GALLON_IN_LITERS
+        unit = 'l'
+
+    costs = ((fill_cost(entry['price_value'], entry['dollars'], amount, unit, tax), position, entry)
+             for position, entry in enumerate(region_prices.entries))
+    stations = []
+    for total_price, _, entry in heapq.nsmallest(limit, costs):
+        station = _public_entry(entry)
+        station['total_price'] = round(total_price, 2)
+        stations.append(station)
+    return {'region': region, 'fuel': fuel, 'refreshed_at': region_prices.refreshed_at,
+            'filled': f"{amount} {unit}", 'tax': f"{tax * 100}%", 'stations': stations}
+
+
+# Query: the regions and fuels currently held in memory
+def query_regions(index, params):
+    return {'regions': [{'region': region, 'fuel': fuel, 'stations': len(region_prices.entries),
+                         'refreshed_at': region_prices.refreshed_at}
+                        for (region, fuel), region_prices in index.regions().items()]}
+
+
+QUERIES = {
+    '/cheapest': query_cheapest,
+    '/stations': query_stations,
+    '/fill': query_fill,
+    '/regions': query_regions,
+}
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Buffer the headers and body into one write, the buffer is flushed after each request
+    wbufsize = 1 << 16
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        # Queries and the response cache both use the snapshot taken here, even if a refresh happens meanwhile
+        index = self.server.price_index.snapshot()
+        # Responses only change when the index is refreshed, so they are built once and served from memory
+        response = index.cached_response(self.path)
+        if response is None:
+            url = urlsplit(self.path)
+            query = QUERIES.get(url.path)
+            if query is None:
+                self._send(404, self._body({'error': f"Unknown path '{url.path}'"}))
+                return
+            try:
+                body = self._body(query(index, parse_qs(url.query)))
+            except QueryError as e:
+                self._send(e.status, self._body({'error': str(e)}))
+                return
+            except (OverflowError, ValueError) as e:
+                # Numbers too large to work with, or results that are not finite and cannot be sent as JSON
+                self._send(400, self._body({'error': f"Query cannot be answered: {e}"}))
+                return
+            response = (f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"', body)
+            index.cache_response(self.path, response)
+
+        etag, body = response
+        if_none_match = [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]
+        if etag in if_none_match or '*' in if_none_match:
+            self._send(304, b'', etag)
+        else:
+            self._send(200, body, etag)
+
+    def _body(self, data):
+        return json.dumps(data, ensure_ascii=False, allow_nan=False).encode('utf-8')
+
+    def _send(self, status, body, etag=None):
+        self.send_response(status)
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        if status != 304:
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.address_string()} - {format % args}")
+
+
+# Function to keep the index fresh by scraping every target again after each interval
+def refresh_prices(index, targets, payment_method, total_pages, refresh_interval, stop_event):
+    while not stop_event.is_set():
+        for region, fuel in targets:
+            try:
+                gas_prices = scrape_data(region, fuel, payment_method, total_pages)
+            except Exception as e:
+                logging.error(f"Failed to refresh prices for {region}, fuel {fuel}: {e}")
+                continue
+            if gas_prices:
+                index.replace(region, fuel, gas_prices)
+            else:
+                logging.error(f"No prices scraped for {region}, fuel {fuel}")
+        stop_event.wait(refresh_interval)
+
+
+# Function to serve cheapest price queries as JSON until interrupted
+def serve(targets, payment_method, total_pages, host='127.0.0.1', port=8080, refresh_interval=900):
+    index = PriceIndex()
+    stop_event = threading.Event()
+    refresher = threading.Thread(target=refresh_prices, daemon=True,
+                                 args=(index, targets, payment_method, total_pages, refresh_interval, stop_event))
+    refresher.start()
+
+    httpd = ThreadingHTTPServer((host, port), QueryHandler)
+    httpd.daemon_threads = True
+    httpd.price_index = index
+    print(f"Serving prices on http://{host}:{port} (/cheapest, /stations, /fill, /regions). Press Ctrl+C to stop.")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping the server.")
+    finally:
+        stop_event.set()
+        httpd.server_close()
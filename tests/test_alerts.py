@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from alerts import AlertEngine, load_rules
+
+RULES = [
+    {'id': 'drop', 'type': 'price_drop', 'region': '90210', 'fuel': 'diesel', 'min_drop': 0.05},
+    {'id': 'near', 'type': 'cheapest_in_radius', 'region': '90210', 'radius': 5},
+]
+
+
+def rules(tmp_path, rule_configs=RULES):
+    filepath = tmp_path / 'rules.json'
+    filepath.write_text(json.dumps(rule_configs), encoding='utf-8')
+    return load_rules(str(filepath))
+
+
+def scrape(engine, gas_prices):
+    on_row = engine.watch('90210', '4')
+    for gas_price in gas_prices:
+        on_row(dict(gas_price))
+    engine.finish_scrape()
+
+
+def station(name, price, distance=None):
+    return {'name': name, 'address': '1 Main St', 'price': price, 'last_updated': '1 hours ago', 'distance': distance}
+
+
+def test_price_drop_fires_across_two_scrapes_with_one_engine(tmp_path):
+    alerts = []
+    engine = AlertEngine(rules(tmp_path), [alerts.append])
+    scrape(engine, [station('A', '$3.50'), station('B', '$3.40')])
+    assert alerts == []
+    scrape(engine, [station('A', '$3.40'), station('B', '$3.38')])
+    assert [(alert['rule'], alert['name']) for alert in alerts] == [('drop', 'A')]
+
+
+def test_price_drop_fires_across_runs_through_state_file(tmp_path):
+    state_filename = str(tmp_path / 'rules_state.json')
+    alerts = []
+    scrape(AlertEngine(rules(tmp_path), [alerts.append], state_filename), [station('A', '$3.50')])
+    scrape(AlertEngine(rules(tmp_path), [alerts.append], state_filename), [station('A', '$3.30')])
+    assert [(alert['rule'], alert['name']) for alert in alerts] == [('drop', 'A')]
+
+
+def test_cheapest_in_radius_reports_once_when_the_scrape_finishes(tmp_path):
+    alerts = []
+    engine = AlertEngine(rules(tmp_path), [alerts.append])
+    scrape(engine, [station('A', '$3.50', 1), station('B', '$3.30', 2), station('C', '$3.00', 9),
+                    station('D', '$3.20', 4), station('E', '$3.25', None)])
+    assert [(alert['rule'], alert['name']) for alert in alerts] == [('near', 'D')]
+
+
+def test_threshold_fires_for_every_station_at_or_below_the_price(tmp_path):
+    alerts = []
+    engine = AlertEngine(rules(tmp_path, [{'id': 'cheap', 'type': 'threshold', 'max_price': 3.3}]), [alerts.append])
+    scrape(engine, [station('A', '$3.50'), station('B', '$3.30'), station('C', '329.9¢'), station('D', 'N/A')])
+    assert [alert['name'] for alert in alerts] == ['B', 'C']
+
+
+def test_below_average_compares_with_the_whole_scrape(tmp_path):
+    alerts = []
+    engine = AlertEngine(rules(tmp_path, [{'id': 'avg', 'type': 'below_average', 'percent': 10, 'min_stations': 3}]),
+                         [alerts.append])
+    # Cheapest first, so a running average of the stations before it would never have caught A
+    scrape(engine, [station('A', '$3.00'), station('B', '$3.50'), station('C', '$3.60'), station('D', '$3.70')])
+    assert [alert['name'] for alert in alerts] == ['A']
+
+
+def test_below_average_needs_min_stations(tmp_path):
+    alerts = []
+    engine = AlertEngine(rules(tmp_path, [{'type': 'below_average', 'percent': 10, 'min_stations': 3}]),
+                         [alerts.append])
+    scrape(engine, [station('A', '$2.00'), station('B', '$3.50')])
+    assert alerts == []
+
+
+@pytest.mark.parametrize('rule_configs', [
+    [1], {'type': 'threshold'}, [{'type': 'unknown'}], [{'type': 'threshold'}],
+    [{'type': 'threshold', 'max_price': float('inf')}], [{'type': 'threshold', 'max_price': 1e308}],
+    [{'type': 'below_average', 'percent': float('nan')}],
+    [{'type': 'below_average', 'percent': 5, 'min_stations': float('inf')}],
+    [{'type': 'price_drop', 'min_drop': float('nan')}],
+    [{'type': 'cheapest_in_radius', 'radius': float('inf')}],
+])
+def test_load_rules_rejects_invalid_rules(tmp_path, rule_configs):
+    with pytest.raises(ValueError):
+        rules(tmp_path, rule_configs)
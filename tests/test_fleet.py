@@ -0,0 +1,47 @@
+import importlib.util
+import json
+import random
+
+import pytest
+
+from fleet import load_vehicles, rank_effective_cost
+from pricing import fill_cost, station_price
+
+# Ranking needs numpy, loading vehicles does not
+needs_numpy = pytest.mark.skipif(importlib.util.find_spec('numpy') is None, reason='numpy is not installed')
+
+VEHICLES = [{'name': 'Van', 'amount': 15, 'unit': 'gal', 'consumption': 0.08},
+            {'name': 'Car', 'amount': 40, 'unit': 'l', 'consumption': 0.1}]
+
+
+@needs_numpy
+def test_matches_brute_force_fill_cost():
+    generator = random.Random(0)
+    gas_prices = [{'name': f"S{i}", 'address': 'x', 'price': f"${generator.uniform(3, 4):.2f}",
+                   'distance': generator.uniform(0, 30)} for i in range(500)]
+    rankings, skipped = rank_effective_cost(gas_prices, VEHICLES, 0.08, 3)
+    assert skipped == 0
+    for vehicle, ranking in zip(VEHICLES, rankings):
+        expected = sorted(gas_prices, key=lambda gas_price: fill_cost(
+            *station_price(gas_price['price']), vehicle['amount'] + 2 * vehicle['consumption'] * gas_price['distance'],
+            vehicle['unit'], 0.08))[:3]
+        assert [entry['name'] for entry in ranking] == [gas_price['name'] for gas_price in expected]
+
+
+@needs_numpy
+def test_counts_stations_without_price_or_distance():
+    gas_prices = [{'name': 'A', 'address': 'x', 'price': '$3.00', 'distance': 1.0},
+                  {'name': 'B', 'address': 'x', 'price': '$2.00'},
+                  {'name': 'C', 'address': 'x', 'price': 'N/A', 'distance': 1.0}]
+    rankings, skipped = rank_effective_cost(gas_prices, VEHICLES, 0, 5)
+    assert skipped == 2
+    assert [[entry['name'] for entry in ranking] for ranking in rankings] == [['A'], ['A']]
+
+
+@pytest.mark.parametrize('vehicle_configs', [{'name': 'Van'}, 3, [1], [{'amount': 'NaN', 'consumption': 0.1}],
+                                             [{'amount': 15, 'consumption': float('inf')}]])
+def test_load_vehicles_rejects_invalid_vehicles(tmp_path, vehicle_configs):
+    filename = tmp_path / "vehicles.json"
+    filename.write_text(json.dumps(vehicle_configs), encoding='utf-8')
+    with pytest.raises(ValueError):
+        load_vehicles(str(filename))
@@ -0,0 +1,65 @@
+import sys
+
+import pytest
+
+from formats import FILE_TYPES, detect_file_type, iter_gas_prices, write_gas_prices
+
+GAS_PRICES = [
+    {'name': 'Shell', 'address': '1 Main St, Springfield, IL, 62701', 'price': '$3.45', 'last_updated': '2 hours ago'},
+    {'name': 'BP', 'address': '2 Oak Ave', 'price': 'N/A', 'last_updated': '2024-01-02'},
+]
+
+
+@pytest.mark.parametrize('file_type', FILE_TYPES)
+def test_round_trip(tmp_path, file_type):
+    if file_type == 'csv.zst':
+        pytest.importorskip('zstandard')
+    if file_type == 'msgpack':
+        pytest.importorskip('msgpack')
+    filepath = tmp_path / f"gas_prices.{file_type}"
+    write_gas_prices(str(filepath), GAS_PRICES, file_type)
+    assert detect_file_type(str(filepath)) == file_type
+    assert list(iter_gas_prices(str(filepath))) == GAS_PRICES
+
+
+def test_txt_skips_malformed_lines(tmp_path):
+    filepath = tmp_path / "gas_prices.txt"
+    filepath.write_text("Shell, 1 Main St, $3.45, 2 hours ago\nnot a station\nBP, 2 Oak Ave, N/A, 2024-01-02\n",
+                        encoding='utf-8')
+    assert [row['name'] for row in iter_gas_prices(str(filepath))] == ['Shell', 'BP']
+
+
+def test_txt_reads_cost_to_fill_layout(tmp_path):
+    filepath = tmp_path / "Total_Price_gas_prices.txt"
+    filepath.write_text("Shell, 1 Main St, Springfield, $3.45, 2 hours ago, 5.0%, 10.0 l, $9.57\n", encoding='utf-8')
+    assert list(iter_gas_prices(str(filepath))) == [{
+        'name': 'Shell', 'address': '1 Main St, Springfield', 'price': '$3.45', 'last_updated': '2 hours ago',
+        'Tax': '5.0%', 'Filled': '10.0 l', 'Total Price': '$9.57'}]
+
+
+def test_file_type_overrides_detection(tmp_path):
+    filepath = tmp_path / "gas_prices.dat"
+    write_gas_prices(str(filepath), GAS_PRICES, 'txt')
+    assert list(iter_gas_prices(str(filepath), 'txt')) == GAS_PRICES
+
+
+def test_compressed_file_is_read_whatever_type_is_given(tmp_path):
+    filepath = tmp_path / "gas_prices.csv.gz"
+    write_gas_prices(str(filepath), GAS_PRICES, 'csv.gz')
+    assert list(iter_gas_prices(str(filepath), 'csv')) == GAS_PRICES
+
+
+def test_csv_read_as_msgpack_is_rejected(tmp_path):
+    pytest.importorskip('msgpack')
+    filepath = tmp_path / "gas_prices.csv"
+    write_gas_prices(str(filepath), GAS_PRICES, 'csv')
+    with pytest.raises(ValueError):
+        list(iter_gas_prices(str(filepath), 'msgpack'))
+
+
+def test_missing_compressor_leaves_no_file(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, 'zstandard', None)
+    filepath = tmp_path / "gas_prices.csv.zst"
+    with pytest.raises(ImportError):
+        write_gas_prices(str(filepath), GAS_PRICES, 'csv.zst')
+    assert not filepath.exists()
@@ -0,0 +1,32 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ['requests', 'bs4', 'matplotlib', 'numpy', 'dateutil']
+# Cumulative import time of main in microseconds, around 20-40 ms is usual so this leaves room for slow machines
+IMPORT_BUDGET_US = 150000
+RUNS = 3
+
+CHECK_MODULES = f"import json, sys, main; print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+
+
+def import_main():
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHECK_MODULES], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    # importtime lines look like 'import time:   self |  cumulative | module'
+    cumulative_us = next(int(line.split('|')[1]) for line in result.stderr.splitlines()
+                         if line.startswith('import time:') and line.split('|')[2].strip() == 'main')
+    return json.loads(result.stdout), cumulative_us
+
+
+def test_main_does_not_import_heavy_modules():
+    loaded, _ = import_main()
+    assert loaded == []
+
+
+def test_main_import_time_within_budget():
+    # The fastest of a few runs so a busy machine does not fail the test
+    fastest_us = min(import_main()[1] for _ in range(RUNS))
+    assert fastest_us < IMPORT_BUDGET_US, f"import main took {fastest_us / 1000:.1f} ms"
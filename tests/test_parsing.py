@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta, timezone
+
+from hypothesis import given, strategies as st
+
+from parsing import convert_price, format_last_updated, parse_price_millis
+
+
+# The price conversion main.py used before the parsing module
+def old_convert_price(price_str):
+    try:
+        price = float(''.join(filter(str.isdigit, price_str)))
+        return price / 10
+    except ValueError:
+        return None
+
+
+# The last updated formatting main.py used before the parsing module
+def old_format_last_updated(posted_time, now):
+    posted_datetime = datetime.fromisoformat(posted_time.rstrip('Z')).replace(tzinfo=timezone.utc)
+    hours_diff = (now - posted_datetime).total_seconds() / 3600
+    if hours_diff < 24:
+        hours_ago = int(hours_diff)
+        return f"{hours_ago} hours ago" if hours_ago > 0 else "Less than an hour ago"
+    return posted_datetime.strftime('%Y-%m-%d')
+
+
+dollar_prices = st.builds(lambda dollars, cents: f"${dollars}.{cents:02d}",
+                          st.integers(0, 99), st.integers(0, 99))
+cent_prices = st.builds(lambda cents, tenths: f"{cents}.{tenths}¢", st.integers(0, 999), st.integers(0, 9))
+prices = st.one_of(dollar_prices, cent_prices, st.just('N/A'), st.just(''),
+                   st.text(alphabet='0123456789.$¢NA/ ,-', max_size=12), st.text(max_size=12))
+
+
+@given(prices)
+def test_convert_price_matches_old_implementation(price_str):
+    assert convert_price(price_str) == old_convert_price(price_str)
+
+
+@given(dollar_prices)
+def test_parse_price_millis_dollars(price_str):
+    assert parse_price_millis(price_str) == round(old_convert_price(price_str) / 10 * 1000)
+
+
+@given(cent_prices)
+def test_parse_price_millis_cents(price_str):
+    assert parse_price_millis(price_str) == round(old_convert_price(price_str) * 10)
+
+
+def test_parse_price_millis_not_available():
+    assert parse_price_millis('N/A') is None
+    assert parse_price_millis('') is None
+
+
+@given(st.datetimes(min_value=datetime(2020, 1, 1), max_value=datetime(2030, 1, 1)),
+       st.timedeltas(min_value=timedelta(0), max_value=timedelta(days=10)))
+def test_format_last_updated_matches_old_implementation(posted, age):
+    posted_time = posted.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+    now = posted.replace(tzinfo=timezone.utc) + age
+    assert format_last_updated(posted_time, now) == old_format_last_updated(posted_time, now)
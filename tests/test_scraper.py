@@ -0,0 +1,27 @@
+import scraper
+
+
+def graphql_page(names, next_cursor):
+    return {'data': {'locationBySearchTerm': {'stations': {'cursor': {'next': next_cursor}, 'results': [
+        {'name': name, 'address': {'line1': '1 Main St'}, 'distance': distance,
+         'prices': [{'credit': {'formattedPrice': '$3.45', 'postedTime': '2024-01-01T00:00:00Z'}}]}
+        for distance, name in enumerate(names, start=1)]}}}}
+
+
+def test_with_distance_fetches_first_page_through_graphql(monkeypatch):
+    pages = {'0': graphql_page(['A', 'B'], '40'), '40': graphql_page(['C'], None)}
+    cursors = []
+
+    def fetch_additional_gas_prices(city_or_postal_code, fuel_type, cursor="40"):
+        cursors.append(cursor)
+        return pages[cursor]
+
+    def fetch_initial_data(*args):
+        raise AssertionError("the HTML page has no distances")
+
+    monkeypatch.setattr(scraper, 'fetch_additional_gas_prices', fetch_additional_gas_prices)
+    monkeypatch.setattr(scraper, 'fetch_initial_data', fetch_initial_data)
+    gas_prices = scraper.scrape_data('90210', '4', 'credit', 5, with_distance=True)
+    assert [(gas_price['name'], gas_price['distance']) for gas_price in gas_prices] == [('A', 1), ('B', 2), ('C', 1)]
+    # Stops once there is no next cursor instead of asking for more pages
+    assert cursors == ['0', '40']
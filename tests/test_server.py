@@ -0,0 +1,74 @@
+import http.client
+import json
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import server
+
+GAS_PRICES = [
+    {'name': 'A', 'address': '1 Main St', 'price': '$3.45', 'last_updated': '1 hours ago'},
+    {'name': 'B', 'address': '2 Main St', 'price': '$3.15', 'last_updated': '2 hours ago'},
+    {'name': 'C', 'address': '3 Main St', 'price': 'N/A', 'last_updated': 'N/A'},
+]
+
+
+@pytest.fixture
+def price_index():
+    index = server.PriceIndex()
+    index.replace('90210', '4', GAS_PRICES)
+    return index
+
+
+@pytest.fixture
+def connection(price_index):
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), server.QueryHandler)
+    httpd.price_index = price_index
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield http.client.HTTPConnection('127.0.0.1', httpd.server_address[1])
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def get(connection, path, headers=None):
+    connection.request('GET', path, headers=headers or {})
+    response = connection.getresponse()
+    return response.status, response.getheader('ETag'), response.read()
+
+
+def test_cheapest_sorted_by_price(connection):
+    status, _, body = get(connection, '/cheapest?region=90210&fuel=diesel&n=5')
+    assert status == 200
+    assert [station['name'] for station in json.loads(body)['stations']] == ['B', 'A']
+
+
+def test_etag_gives_not_modified(connection):
+    _, etag, _ = get(connection, '/regions')
+    status, _, body = get(connection, '/regions', {'If-None-Match': etag})
+    assert status == 304
+    assert body == b''
+
+
+@pytest.mark.parametrize('path', [
+    '/fill?region=90210&fuel=4&amount=nan',
+    '/fill?region=90210&fuel=4&amount=inf',
+    '/fill?region=90210&fuel=4&amount=-1',
+    '/fill?region=90210&fuel=4&amount=abc',
+    '/fill?region=90210&fuel=4&amount=1e308&tax=1e308',
+    '/stations?region=90210&fuel=4&max_price=1e306',
+])
+def test_fill_rejects_invalid_amounts(connection, path):
+    status, _, body = get(connection, path)
+    assert status == 400
+    assert 'error' in json.loads(body)
+
+
+def test_response_built_before_refresh_is_not_cached_after_it(price_index):
+    snapshot = price_index.snapshot()
+    body = json.dumps(server.query_cheapest(snapshot, {'region': ['90210'], 'fuel': ['4']}))
+    price_index.replace('90210', '4', GAS_PRICES[:1])
+    # The handler caches into the snapshot it queried, which is no longer the live one
+    snapshot.cache_response('/cheapest?region=90210&fuel=4', ('"stale"', body))
+    assert price_index.snapshot().cached_response('/cheapest?region=90210&fuel=4') is None